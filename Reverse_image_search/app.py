@@ -5,6 +5,9 @@ import base64
 import os
 from io import BytesIO
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from provider_health import ProviderHealth
 
 app = Flask(__name__, static_folder='static')
 CORS(app)
@@ -18,11 +21,27 @@ API_CONFIG = {
     'tineye_secret': os.getenv('TINEYE_SECRET', ''),
 }
 
+# Provider endpoints - override these to point the app at a stand-in server
+# (e.g. mock_providers.py) for local load testing
+API_ENDPOINTS = {
+    'google': os.getenv('GOOGLE_ENDPOINT', 'https://www.googleapis.com/customsearch/v1'),
+    'bing': os.getenv('BING_ENDPOINT', 'https://api.bing.microsoft.com/v7.0/images/visualsearch'),
+    'tineye': os.getenv('TINEYE_ENDPOINT', 'https://api.tineye.com/rest/search/'),
+}
+
+# Rolling health, circuit breaker and adaptive timeout per provider.
+# The base timeouts are the upper bound used until latency data is available.
+PROVIDER_HEALTH = {
+    'google': ProviderHealth('google', base_timeout=10),
+    'bing': ProviderHealth('bing', base_timeout=15),
+    'tineye': ProviderHealth('tineye', base_timeout=10),
+}
+
 class ReverseImageSearch:
     """Base class for reverse image search implementations"""
     
     @staticmethod
-    def google_search(image_data, api_key, cx):
+    def google_search(image_data, api_key, cx, timeout=10):
         """Google Reverse Image Search using Custom Search API
         
         Note: Google Custom Search API doesn't directly support reverse image search.
@@ -36,7 +55,7 @@ class ReverseImageSearch:
         try:
             # For demonstration, we'll use the image search API
             # In production, you'd need to implement actual reverse image search
-            url = "https://www.googleapis.com/customsearch/v1"
+            url = API_ENDPOINTS['google']
             
             # Convert image to base64 for potential use
             image_base64 = base64.b64encode(image_data).decode('utf-8')
@@ -50,7 +69,7 @@ class ReverseImageSearch:
                 'q': 'image search',  # Placeholder query
                 'num': 10
             }
-            response = requests.get(url, params=params, timeout=10)
+            response = requests.get(url, params=params, timeout=timeout)
             if response.status_code == 200:
                 data = response.json()
                 return {
@@ -60,14 +79,16 @@ class ReverseImageSearch:
                     'note': 'Google Custom Search API requires additional setup for true reverse image search'
                 }
             return {'success': False, 'error': f'API returned status {response.status_code}'}
+        except requests.exceptions.Timeout as e:
+            return {'success': False, 'error': str(e), 'timed_out': True}
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
     @staticmethod
-    def bing_visual_search(image_data, api_key):
+    def bing_visual_search(image_data, api_key, timeout=15):
         """Bing Visual Search API"""
         try:
-            endpoint = "https://api.bing.microsoft.com/v7.0/images/visualsearch"
+            endpoint = API_ENDPOINTS['bing']
             headers = {
                 'Ocp-Apim-Subscription-Key': api_key
             }
@@ -86,7 +107,7 @@ class ReverseImageSearch:
                 })
             }
             
-            response = requests.post(endpoint, headers=headers, files=files, data=data, timeout=15)
+            response = requests.post(endpoint, headers=headers, files=files, data=data, timeout=timeout)
             
             if response.status_code == 200:
                 data = response.json()
@@ -111,18 +132,19 @@ class ReverseImageSearch:
             else:
                 error_text = response.text[:200] if response.text else 'Unknown error'
                 return {'success': False, 'error': f'API returned status {response.status_code}: {error_text}'}
+        except requests.exceptions.Timeout as e:
+            return {'success': False, 'error': str(e), 'timed_out': True}
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
     @staticmethod
-    def tineye_search(image_data, api_key, secret):
+    def tineye_search(image_data, api_key, secret, timeout=10):
         """TinEye Reverse Image Search API"""
         try:
             import hmac
             import hashlib
-            import time
             
-            endpoint = "https://api.tineye.com/rest/search/"
+            endpoint = API_ENDPOINTS['tineye']
             timestamp = str(int(time.time()))
             
             # TinEye uses HMAC authentication
@@ -140,7 +162,7 @@ class ReverseImageSearch:
             }
             
             files = {'image': ('image.jpg', image_data, 'image/jpeg')}
-            response = requests.post(endpoint, headers=headers, files=files, timeout=10)
+            response = requests.post(endpoint, headers=headers, files=files, timeout=timeout)
             
             if response.status_code == 200:
                 data = response.json()
@@ -150,6 +172,8 @@ class ReverseImageSearch:
                     'total_results': data.get('total_results', 0)
                 }
             return {'success': False, 'error': f'API returned status {response.status_code}'}
+        except requests.exceptions.Timeout as e:
+            return {'success': False, 'error': str(e), 'timed_out': True}
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
@@ -167,6 +191,27 @@ class ReverseImageSearch:
         except Exception as e:
             return {'success': False, 'error': str(e)}
 
+def call_provider(name, search_func, *args):
+    """Call a provider through its circuit breaker with an adaptive timeout"""
+    health = PROVIDER_HEALTH[name]
+    ticket = health.allow_request()
+    if ticket is None:
+        return {
+            'success': False,
+            'error': 'Provider temporarily skipped after repeated failures (circuit open)',
+            'circuit': 'open'
+        }
+
+    start = time.monotonic()
+    result = search_func(*args, timeout=ticket['timeout'])
+    health.record(
+        ticket,
+        time.monotonic() - start,
+        result.get('success', False),
+        result.get('timed_out', False)
+    )
+    return result
+
 @app.route('/')
 def index():
     return send_from_directory('static', 'index.html')
@@ -188,10 +233,12 @@ def compare_apis():
             return jsonify({'error': 'Invalid image data format'}), 400
         
         results = {}
+        calls = {}
         
         # Google Search
         if API_CONFIG['google_api_key'] and API_CONFIG['google_cx']:
-            results['google'] = ReverseImageSearch.google_search(
+            calls['google'] = (
+                ReverseImageSearch.google_search,
                 image_bytes,
                 API_CONFIG['google_api_key'],
                 API_CONFIG['google_cx']
@@ -201,7 +248,8 @@ def compare_apis():
         
         # Bing Visual Search
         if API_CONFIG['bing_api_key']:
-            results['bing'] = ReverseImageSearch.bing_visual_search(
+            calls['bing'] = (
+                ReverseImageSearch.bing_visual_search,
                 image_bytes,
                 API_CONFIG['bing_api_key']
             )
@@ -210,7 +258,8 @@ def compare_apis():
         
         # TinEye Search
         if API_CONFIG['tineye_api_key'] and API_CONFIG['tineye_secret']:
-            results['tineye'] = ReverseImageSearch.tineye_search(
+            calls['tineye'] = (
+                ReverseImageSearch.tineye_search,
                 image_bytes,
                 API_CONFIG['tineye_api_key'],
                 API_CONFIG['tineye_secret']
@@ -218,6 +267,17 @@ def compare_apis():
         else:
             results['tineye'] = {'success': False, 'error': 'API key not configured'}
         
+        # Query the configured providers concurrently, so the comparison takes
+        # as long as the slowest provider rather than the sum of all of them
+        if calls:
+            with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+                futures = {
+                    name: pool.submit(call_provider, name, *call)
+                    for name, call in calls.items()
+                }
+                for name, future in futures.items():
+                    results[name] = future.result()
+        
         # Yandex (placeholder)
         results['yandex'] = ReverseImageSearch.yandex_search(None)
         
@@ -255,8 +315,15 @@ def get_services():
             'features': ['Web scraping required', 'No official API']
         }
     }
+    for name, health in PROVIDER_HEALTH.items():
+        services[name]['health'] = health.stats()
     return jsonify(services)
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Get rolling latency, error rate and circuit state for each provider"""
+    return jsonify({name: health.stats() for name, health in PROVIDER_HEALTH.items()})
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
 
@@ -0,0 +1,121 @@
+"""Load generator for the /api/compare endpoint.
+
+Run the app against mock_providers.py (see README) and then:
+
+    python benchmark.py --url http://localhost:5000 --requests 500 --concurrency 20
+
+Reports throughput and p50/p95/p99 latency for the whole compare request.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import base64
+import math
+import os
+import threading
+import time
+import requests
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def load_image(path, size):
+    """Return the image to send as a base64 data URL
+
+    Uses the given file, or random bytes of the given size when no file is set.
+    The app does not inspect the image contents, so random bytes are fine.
+    """
+    if path:
+        with open(path, 'rb') as f:
+            image_bytes = f.read()
+    else:
+        image_bytes = os.urandom(size)
+    return 'data:image/jpeg;base64,' + base64.b64encode(image_bytes).decode('utf-8')
+
+
+def run_benchmark(url, image_data, total_requests, concurrency, timeout):
+    """Fire total_requests compare calls using concurrency worker threads"""
+    endpoint = url.rstrip('/') + '/api/compare'
+    payload = {'image_data': image_data}
+    local = threading.local()
+
+    def one_request(_):
+        # One session per worker thread so connections are reused
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = local.session.post(endpoint, json=payload, timeout=timeout)
+            status = response.status_code
+            provider_failures = 0
+            if status == 200:
+                provider_failures = sum(
+                    1 for name, result in response.json().items()
+                    if name != 'yandex' and not result.get('success')
+                )
+        except requests.RequestException as e:
+            status = type(e).__name__
+            provider_failures = 0
+        return time.perf_counter() - start, status, provider_failures
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one_request, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    return samples, elapsed
+
+
+def report(samples, elapsed, concurrency):
+    """Print a summary of the collected samples"""
+    latencies = sorted(latency for latency, _, _ in samples)
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[status] = statuses.get(status, 0) + 1
+    ok = statuses.get(200, 0)
+    provider_failures = sum(failures for _, _, failures in samples)
+
+    print(f'Requests:          {len(samples)} ({ok} OK) with concurrency {concurrency}')
+    print(f'Wall time:         {elapsed:.2f} s')
+    print(f'Throughput:        {len(samples) / elapsed:.2f} req/s' if elapsed else 'Throughput:        n/a')
+    print(f'Latency mean:      {sum(latencies) / len(latencies) * 1000:.1f} ms')
+    print(f'Latency p50:       {percentile(latencies, 50) * 1000:.1f} ms')
+    print(f'Latency p95:       {percentile(latencies, 95) * 1000:.1f} ms')
+    print(f'Latency p99:       {percentile(latencies, 99) * 1000:.1f} ms')
+    print(f'Latency max:       {latencies[-1] * 1000:.1f} ms')
+    print(f'Provider failures: {provider_failures}')
+    print('Status codes:      ' + ', '.join(f'{status}={count}' for status, count in sorted(
+        statuses.items(), key=lambda item: str(item[0]))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the /api/compare endpoint')
+    parser.add_argument('--url', default='http://localhost:5000', help='Base URL of the app')
+    parser.add_argument('--requests', type=int, default=200, help='Total requests to send (default: 200)')
+    parser.add_argument('--concurrency', type=int, default=10, help='Concurrent clients (default: 10)')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed requests sent first (default: 5)')
+    parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds (default: 60)')
+    parser.add_argument('--image', help='Image file to upload (default: random bytes)')
+    parser.add_argument('--image-size', type=int, default=50 * 1024,
+                        help='Size in bytes of the random image when --image is not set (default: 51200)')
+    args = parser.parse_args()
+
+    if args.requests < 1 or args.concurrency < 1:
+        parser.error('--requests and --concurrency must be at least 1')
+
+    image_data = load_image(args.image, args.image_size)
+
+    if args.warmup > 0:
+        run_benchmark(args.url, image_data, args.warmup, min(args.concurrency, args.warmup), args.timeout)
+
+    samples, elapsed = run_benchmark(args.url, image_data, args.requests, args.concurrency, args.timeout)
+    report(samples, elapsed, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
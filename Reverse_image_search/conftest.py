@@ -0,0 +1,51 @@
+import time
+import pytest
+import app as app_module
+from provider_health import ProviderHealth
+
+# Fixed tunables so the tests do not depend on the environment
+HEALTH_TEST_CONFIG = {
+    'window_size': 100,
+    'min_samples': 10,
+    'failure_threshold': 5,
+    'error_rate_threshold': 0.5,
+    'cooldown': 30.0,
+    'timeout_multiplier': 2.0,
+    'min_timeout': 1.0,
+}
+
+
+class FakeClock:
+    """Stand-in for time.monotonic that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Simulated time for provider_health and app.call_provider"""
+    fake = FakeClock()
+    monkeypatch.setattr(time, 'monotonic', fake)
+    return fake
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Fresh ProviderHealth instances installed in the app"""
+    fresh = {}
+    for name, health in app_module.PROVIDER_HEALTH.items():
+        fresh[name] = ProviderHealth(name, base_timeout=health.base_timeout, config=dict(HEALTH_TEST_CONFIG))
+        monkeypatch.setitem(app_module.PROVIDER_HEALTH, name, fresh[name])
+    return fresh
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
@@ -0,0 +1,197 @@
+"""Local stand-in server for the Google, Bing and TinEye search endpoints.
+
+Lets app.py be load tested without calling (and paying for) the real APIs.
+Start it, then point the app at it:
+
+    python mock_providers.py --port 5001 --latency lognormal:120:40 --error-rate 0.02
+
+    export GOOGLE_ENDPOINT=http://localhost:5001/customsearch/v1
+    export BING_ENDPOINT=http://localhost:5001/v7.0/images/visualsearch
+    export TINEYE_ENDPOINT=http://localhost:5001/rest/search/
+
+Every option can also be set per provider (e.g. --bing-latency, --tineye-error-rate)
+so a single degraded upstream can be simulated.
+"""
+from flask import Flask, request, jsonify
+import argparse
+import math
+import random
+import time
+
+app = Flask(__name__)
+
+PROVIDERS = ('google', 'bing', 'tineye')
+
+# Per-provider behaviour, filled in from the command line in main()
+MOCK_CONFIG = {
+    provider: {
+        'latency': ('fixed', 50.0, 0.0),
+        'error_rate': 0.0,
+        'error_status': 503,
+        'results': 10,
+        'padding': 0,
+    }
+    for provider in PROVIDERS
+}
+
+
+def parse_latency(spec):
+    """Parse a latency spec of the form 'dist:a[:b]' with values in milliseconds
+
+    Supported distributions:
+        fixed:MS                 - always MS
+        uniform:LOW:HIGH         - uniform between LOW and HIGH
+        normal:MEAN:STDDEV       - gaussian, clamped at 0
+        lognormal:MEDIAN:STDDEV  - log-normal with the given median and standard deviation,
+                                   long right tail
+        exponential:MEAN         - exponential with the given mean
+    """
+    parts = spec.split(':')
+    dist = parts[0]
+    try:
+        values = [float(v) for v in parts[1:]]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Invalid latency values in {spec!r}')
+
+    expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2, 'exponential': 1}
+    if dist not in expected:
+        raise argparse.ArgumentTypeError(f'Unknown latency distribution {dist!r}')
+    if len(values) != expected[dist]:
+        raise argparse.ArgumentTypeError(f'{dist} latency expects {expected[dist]} value(s)')
+    if any(v < 0 for v in values):
+        raise argparse.ArgumentTypeError('Latency values must not be negative')
+
+    return (dist, values[0], values[1] if len(values) > 1 else 0.0)
+
+
+def sample_latency(latency):
+    """Draw a single delay in seconds from a parsed latency spec"""
+    dist, a, b = latency
+    if dist == 'uniform':
+        ms = random.uniform(a, b)
+    elif dist == 'normal':
+        ms = random.gauss(a, b)
+    elif dist == 'lognormal':
+        # a is the median, b the standard deviation of the output. For a
+        # log-normal with median m, variance is m^2 * u * (u - 1) with
+        # u = exp(sigma^2), so solve that quadratic for u.
+        ratio = (b / a) if a else 0.0
+        u = (1 + math.sqrt(1 + 4 * ratio * ratio)) / 2
+        ms = a * random.lognormvariate(0, math.sqrt(math.log(u)))
+    elif dist == 'exponential':
+        ms = random.expovariate(1.0 / a) if a else 0.0
+    else:
+        ms = a
+    return max(ms, 0.0) / 1000.0
+
+
+def simulate(provider):
+    """Sleep for the configured latency and decide whether to fail
+
+    Returns an error response tuple, or None if the request should succeed.
+    """
+    config = MOCK_CONFIG[provider]
+    time.sleep(sample_latency(config['latency']))
+    if random.random() < config['error_rate']:
+        return jsonify({'error': f'Simulated {provider} failure'}), config['error_status']
+    return None
+
+
+def fake_result(provider, index):
+    """Build one result item; padding inflates the payload size"""
+    config = MOCK_CONFIG[provider]
+    return {
+        'title': f'Mock {provider} result {index}',
+        'link': f'https://example.com/{provider}/{index}.jpg',
+        'snippet': 'x' * config['padding'],
+    }
+
+
+@app.route('/customsearch/v1', methods=['GET'])
+def google_custom_search():
+    """Stand-in for the Google Custom Search API"""
+    if not request.args.get('key') or not request.args.get('cx'):
+        return jsonify({'error': 'Missing key or cx parameter'}), 400
+    error = simulate('google')
+    if error:
+        return error
+    count = MOCK_CONFIG['google']['results']
+    return jsonify({
+        'items': [fake_result('google', i) for i in range(count)],
+        'searchInformation': {'totalResults': str(count)},
+    })
+
+
+@app.route('/v7.0/images/visualsearch', methods=['POST'])
+def bing_visual_search():
+    """Stand-in for the Bing Visual Search API"""
+    if not request.headers.get('Ocp-Apim-Subscription-Key'):
+        return jsonify({'error': 'Missing subscription key'}), 401
+    error = simulate('bing')
+    if error:
+        return error
+    count = MOCK_CONFIG['bing']['results']
+    return jsonify({
+        'tags': [{
+            'actions': [{
+                'actionType': 'VisualSearch',
+                'data': {'value': [fake_result('bing', i) for i in range(count)]},
+            }]
+        }]
+    })
+
+
+@app.route('/rest/search/', methods=['POST'])
+def tineye_search():
+    """Stand-in for the TinEye search API"""
+    if not request.headers.get('x-api-key') or not request.headers.get('x-api-signature'):
+        return jsonify({'error': 'Missing API key or signature'}), 401
+    error = simulate('tineye')
+    if error:
+        return error
+    count = MOCK_CONFIG['tineye']['results']
+    return jsonify({
+        'results': [fake_result('tineye', i) for i in range(count)],
+        'total_results': count,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock reverse image search providers')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--seed', type=int, help='Random seed for reproducible runs')
+    parser.add_argument('--latency', type=parse_latency, default=('fixed', 50.0, 0.0),
+                        help='Latency for all providers, e.g. fixed:50, uniform:20:200, '
+                             'normal:100:30, lognormal:120:40, exponential:80 (default: fixed:50)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests that fail, 0.0-1.0 (default: 0)')
+    parser.add_argument('--error-status', type=int, default=503,
+                        help='HTTP status returned for simulated failures (default: 503)')
+    parser.add_argument('--results', type=int, default=10,
+                        help='Number of result items per response (default: 10)')
+    parser.add_argument('--padding', type=int, default=0,
+                        help='Extra bytes added to each result item to grow the payload (default: 0)')
+    for provider in PROVIDERS:
+        parser.add_argument(f'--{provider}-latency', type=parse_latency)
+        parser.add_argument(f'--{provider}-error-rate', type=float)
+        parser.add_argument(f'--{provider}-error-status', type=int)
+        parser.add_argument(f'--{provider}-results', type=int)
+        parser.add_argument(f'--{provider}-padding', type=int)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    for provider in PROVIDERS:
+        for key in ('latency', 'error_rate', 'error_status', 'results', 'padding'):
+            override = getattr(args, f'{provider}_{key}')
+            MOCK_CONFIG[provider][key] = override if override is not None else getattr(args, key)
+        if not 0.0 <= MOCK_CONFIG[provider]['error_rate'] <= 1.0:
+            parser.error(f'{provider} error rate must be between 0 and 1')
+
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""Per-provider health tracking for the reverse image search APIs.
+
+Each provider gets a ProviderHealth that keeps a rolling window of recent calls
+and uses it to:
+
+- open a circuit (skip the provider) after repeated failures, for a cooldown period
+- derive an adaptive request timeout from the observed p95 latency
+- report latency and error statistics for /api/services and /api/metrics
+"""
+from collections import deque
+import math
+import os
+import threading
+import time
+
+# Tunables - can be overridden with environment variables
+HEALTH_CONFIG = {
+    'window_size': int(os.getenv('HEALTH_WINDOW_SIZE', '100')),
+    'min_samples': int(os.getenv('HEALTH_MIN_SAMPLES', '10')),
+    'failure_threshold': int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5')),
+    'error_rate_threshold': float(os.getenv('CIRCUIT_ERROR_RATE_THRESHOLD', '0.5')),
+    'cooldown': float(os.getenv('CIRCUIT_COOLDOWN', '30')),
+    'timeout_multiplier': float(os.getenv('ADAPTIVE_TIMEOUT_MULTIPLIER', '2.0')),
+    'min_timeout': float(os.getenv('ADAPTIVE_TIMEOUT_MIN', '1.0')),
+}
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Outcomes kept in the rolling window
+OK = 'ok'
+ERROR = 'error'
+SLOW = 'slow'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class ProviderHealth:
+    """Rolling latency/error statistics and circuit breaker for one provider
+
+    Usage:
+
+        ticket = health.allow_request()
+        if ticket is None:
+            ...  # circuit open, skip the provider
+        result = search(timeout=ticket['timeout'])
+        health.record(ticket, latency, success, timed_out)
+    """
+
+    def __init__(self, name, base_timeout, config=None):
+        self.name = name
+        self.base_timeout = base_timeout
+        self.config = config or HEALTH_CONFIG
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=self.config['window_size'])  # (latency, outcome)
+        self._consecutive_failures = 0
+        self._state = CLOSED
+        # Bumped every time the circuit opens, so calls started before that
+        # can be told apart from calls made afterwards
+        self._generation = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._total_calls = 0
+        self._total_failures = 0
+        self._total_slow = 0
+        self._total_skipped = 0
+
+    def _refresh_state(self):
+        """Move an open circuit to half-open once the cooldown has passed"""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.config['cooldown']:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+
+    def _timeout_locked(self):
+        """Request timeout in seconds; the caller must hold the lock
+
+        Falls back to the provider's fixed timeout until enough samples have
+        been collected, and never exceeds it. Calls cut off by the adaptive
+        timeout are kept in the window at that timeout, so a provider that
+        slows down pushes its own timeout up. The half-open trial always gets
+        the fixed timeout.
+        """
+        self._refresh_state()
+        if self._state == HALF_OPEN or len(self._samples) < self.config['min_samples']:
+            return self.base_timeout
+        latencies = sorted(latency for latency, _ in self._samples)
+        adaptive = percentile(latencies, 95) * self.config['timeout_multiplier']
+        return min(self.base_timeout, max(self.config['min_timeout'], adaptive))
+
+    def timeout(self):
+        """Request timeout in seconds, derived from the observed p95 latency"""
+        with self._lock:
+            return self._timeout_locked()
+
+    def allow_request(self):
+        """Return a ticket for a call to the provider, or None to skip it
+
+        The ticket holds the timeout to use and must be passed back to
+        record(). While half-open only a single trial call is let through;
+        its outcome decides whether the circuit closes again or re-opens.
+        """
+        with self._lock:
+            timeout = self._timeout_locked()
+            trial = False
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                trial = True
+            elif self._state != CLOSED:
+                self._total_skipped += 1
+                return None
+            return {'timeout': timeout, 'trial': trial, 'generation': self._generation}
+
+    def record(self, ticket, latency, success, timed_out=False):
+        """Record the outcome of a call and update the circuit state
+
+        A call that hit an adaptive timeout below the provider's fixed timeout
+        is kept as a slow sample and does not count towards opening the
+        circuit; only errors and timeouts at the fixed limit do.
+        """
+        with self._lock:
+            self._total_calls += 1
+            if success:
+                outcome = OK
+            elif timed_out and ticket['timeout'] < self.base_timeout:
+                outcome = SLOW
+                self._total_slow += 1
+            else:
+                outcome = ERROR
+                self._total_failures += 1
+
+            # Calls started before the circuit last opened say nothing about
+            # the provider now: they must not close, reopen or extend it
+            if ticket['generation'] != self._generation:
+                return
+
+            if self._state == HALF_OPEN:
+                if not ticket['trial']:
+                    return
+                self._trial_in_flight = False
+                if outcome == OK:
+                    # Start the window afresh so failures from the outage do not
+                    # count against the recovered provider
+                    self._state = CLOSED
+                    self._consecutive_failures = 0
+                    self._samples.clear()
+                    self._samples.append((latency, outcome))
+                else:
+                    self._open()
+                return
+
+            self._samples.append((latency, outcome))
+            if outcome == OK:
+                self._consecutive_failures = 0
+            elif outcome == ERROR:
+                self._consecutive_failures += 1
+                if self._should_trip():
+                    self._open()
+
+    def _open(self):
+        """Open the circuit; the caller must hold the lock"""
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._generation += 1
+        self._trial_in_flight = False
+
+    def _should_trip(self):
+        """Check the failure thresholds against the rolling window"""
+        if self._consecutive_failures >= self.config['failure_threshold']:
+            return True
+        if len(self._samples) < self.config['min_samples']:
+            return False
+        failures = sum(1 for _, outcome in self._samples if outcome == ERROR)
+        return failures / len(self._samples) >= self.config['error_rate_threshold']
+
+    def stats(self):
+        """Snapshot of the provider's health for the API"""
+        with self._lock:
+            timeout = self._timeout_locked()
+            latencies = sorted(latency for latency, _ in self._samples)
+            failures = sum(1 for _, outcome in self._samples if outcome == ERROR)
+            slow = sum(1 for _, outcome in self._samples if outcome == SLOW)
+            retry_in = None
+            if self._state == OPEN:
+                retry_in = max(self.config['cooldown'] - (time.monotonic() - self._opened_at), 0.0)
+
+            def ms(value):
+                return round(value * 1000, 1) if value is not None else None
+
+            return {
+                'circuit': self._state,
+                'retry_in_seconds': round(retry_in, 1) if retry_in is not None else None,
+                'timeout_seconds': round(timeout, 3),
+                'base_timeout_seconds': self.base_timeout,
+                'window_size': len(self._samples),
+                'error_rate': round(failures / len(self._samples), 3) if self._samples else 0.0,
+                'slow_rate': round(slow / len(self._samples), 3) if self._samples else 0.0,
+                'consecutive_failures': self._consecutive_failures,
+                'latency_ms': {
+                    'p50': ms(percentile(latencies, 50)),
+                    'p95': ms(percentile(latencies, 95)),
+                    'p99': ms(percentile(latencies, 99)),
+                    'max': ms(latencies[-1] if latencies else None),
+                },
+                'total_calls': self._total_calls,
+                'total_failures': self._total_failures,
+                'total_slow': self._total_slow,
+                'total_skipped': self._total_skipped,
+            }
@@ -0,0 +1,92 @@
+"""Checks for the provider health endpoints and the concurrent /api/compare."""
+import base64
+import threading
+import app as app_module
+from app import call_provider
+
+LATENCY_KEYS = {'p50', 'p95', 'p99', 'max'}
+HEALTH_KEYS = {
+    'circuit', 'retry_in_seconds', 'timeout_seconds', 'base_timeout_seconds',
+    'window_size', 'error_rate', 'slow_rate', 'consecutive_failures', 'latency_ms',
+    'total_calls', 'total_failures', 'total_slow', 'total_skipped',
+}
+
+
+def failing_search(*args, timeout):
+    return {'success': False, 'error': 'API returned status 503'}
+
+
+def ok_search(*args, timeout):
+    return {'success': True, 'results': [], 'total_results': 0}
+
+
+def trip_google():
+    for _ in range(5):
+        call_provider('google', failing_search)
+
+
+def test_metrics_endpoint(client, providers, clock):
+    call_provider('bing', ok_search)
+    trip_google()
+
+    metrics = client.get('/api/metrics').get_json()
+    assert set(metrics) == {'google', 'bing', 'tineye'}
+    for stats in metrics.values():
+        assert set(stats) == HEALTH_KEYS
+        assert set(stats['latency_ms']) == LATENCY_KEYS
+
+    assert metrics['google']['circuit'] == 'open'
+    assert metrics['google']['total_failures'] == 5
+    assert metrics['google']['error_rate'] == 1.0
+    assert metrics['google']['retry_in_seconds'] == 30.0
+    assert metrics['bing']['circuit'] == 'closed'
+    assert metrics['bing']['total_calls'] == 1
+    assert metrics['tineye']['window_size'] == 0
+    assert metrics['tineye']['latency_ms']['p95'] is None
+
+
+def test_services_include_health(client, providers, clock):
+    trip_google()
+
+    services = client.get('/api/services').get_json()
+    for name in ('google', 'bing', 'tineye'):
+        assert set(services[name]['health']) == HEALTH_KEYS
+    assert 'health' not in services['yandex']
+    assert services['google']['health']['circuit'] == 'open'
+    assert services['bing']['health']['circuit'] == 'closed'
+
+
+def test_compare_calls_providers_concurrently(client, providers, monkeypatch):
+    for key in app_module.API_CONFIG:
+        monkeypatch.setitem(app_module.API_CONFIG, key, 'test')
+
+    # Each stub only returns once all three are running at the same time
+    barrier = threading.Barrier(3, timeout=5)
+
+    def concurrent_search(*args, timeout):
+        barrier.wait()
+        return ok_search(timeout=timeout)
+
+    for method in ('google_search', 'bing_visual_search', 'tineye_search'):
+        monkeypatch.setattr(app_module.ReverseImageSearch, method, concurrent_search)
+
+    image_data = 'data:image/jpeg;base64,' + base64.b64encode(b'image').decode('utf-8')
+    results = client.post('/api/compare', json={'image_data': image_data}).get_json()
+    for name in ('google', 'bing', 'tineye'):
+        assert results[name]['success'], results[name]
+        assert providers[name].stats()['total_calls'] == 1
+
+
+def test_compare_skips_provider_with_open_circuit(client, providers, clock, monkeypatch):
+    for key in app_module.API_CONFIG:
+        monkeypatch.setitem(app_module.API_CONFIG, key, 'test')
+    for method in ('google_search', 'bing_visual_search', 'tineye_search'):
+        monkeypatch.setattr(app_module.ReverseImageSearch, method, ok_search)
+    trip_google()
+
+    image_data = base64.b64encode(b'image').decode('utf-8')
+    results = client.post('/api/compare', json={'image_data': image_data}).get_json()
+    assert results['google']['circuit'] == 'open'
+    assert not results['google']['success']
+    assert results['bing']['success'] and results['tineye']['success']
+    assert providers['google'].stats()['total_skipped'] == 1
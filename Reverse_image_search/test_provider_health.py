@@ -0,0 +1,168 @@
+"""Checks for the circuit breaker and adaptive timeouts.
+
+Calls go through app.call_provider with a stub search function, and time is
+simulated, so the cooldown and slow-provider scenarios run instantly.
+"""
+import pytest
+from app import call_provider
+from provider_health import CLOSED, OPEN, HALF_OPEN
+
+
+def stub_search(clock, latency, fails=False):
+    """Search function that takes latency seconds of simulated time"""
+    def search(timeout):
+        if latency > timeout:
+            clock.advance(timeout)
+            return {'success': False, 'error': 'Read timed out', 'timed_out': True}
+        clock.advance(latency)
+        if fails:
+            return {'success': False, 'error': 'API returned status 503'}
+        return {'success': True, 'results': [], 'total_results': 0}
+    return search
+
+
+@pytest.fixture
+def health(providers):
+    return providers['google']
+
+
+@pytest.fixture
+def call(clock, health):
+    """Make one call to the google provider; returns skipped, timeout, error or ok"""
+    def make_call(latency, fails=False):
+        result = call_provider('google', stub_search(clock, latency, fails))
+        if result.get('circuit') == OPEN:
+            return 'skipped'
+        if result.get('timed_out'):
+            return 'timeout'
+        return 'ok' if result['success'] else 'error'
+    return make_call
+
+
+def test_trip_half_open_and_close(clock, health, call):
+    for _ in range(20):
+        assert call(0.1) == 'ok'
+    for _ in range(5):
+        assert call(0.1, fails=True) == 'error'
+    assert health.stats()['circuit'] == OPEN
+    assert call(0.1) == 'skipped'
+
+    clock.advance(30.5)
+    assert health.stats()['circuit'] == HALF_OPEN
+    # Only a single trial is let through while half-open
+    trial = health.allow_request()
+    assert trial['trial'] and trial['timeout'] == 10
+    assert health.allow_request() is None
+    health.record(trial, 0.1, True)
+    assert health.stats()['circuit'] == CLOSED
+
+
+def test_failed_trial_reopens_for_full_cooldown(clock, health, call):
+    for _ in range(5):
+        call(0.1, fails=True)
+    clock.advance(30.5)
+    assert call(0.1, fails=True) == 'error'
+    assert health.stats()['circuit'] == OPEN
+    clock.advance(29.5)
+    assert call(0.1) == 'skipped'
+    clock.advance(1)
+    assert call(0.1) == 'ok'
+    assert health.stats()['circuit'] == CLOSED
+
+
+def test_in_flight_failures_do_not_extend_cooldown(clock, health, call):
+    in_flight = [health.allow_request() for _ in range(3)]
+    for _ in range(5):
+        call(0.1, fails=True)
+    clock.advance(20)
+    # Calls started before the circuit opened finish late with failures
+    for ticket in in_flight:
+        health.record(ticket, 20, False)
+    clock.advance(10.5)
+    assert health.stats()['circuit'] == HALF_OPEN
+
+
+def test_late_calls_do_not_decide_half_open(clock, health, call):
+    # A cooldown shorter than the base timeout lets pre-open calls finish
+    # while the circuit is half-open
+    health.config['cooldown'] = 5.0
+    late = [health.allow_request() for _ in range(2)]
+    for _ in range(5):
+        call(0.1, fails=True)
+    clock.advance(5.5)
+    trial = health.allow_request()
+    assert trial['trial']
+
+    health.record(late[0], 8, True)
+    assert health.stats()['circuit'] == HALF_OPEN
+    health.record(late[1], 8, False)
+    assert health.stats()['circuit'] == HALF_OPEN
+
+    health.record(trial, 0.1, True)
+    assert health.stats()['circuit'] == CLOSED
+
+
+def test_recovered_provider_starts_with_clean_window(clock, health, call):
+    for _ in range(100):
+        call(0.1)
+    # One hour outage, probed by a trial after every cooldown
+    while clock.now < 1000 + 3600:
+        call(0.1, fails=True)
+        clock.advance(1)
+    clock.advance(30.5)
+    assert call(0.1) == 'ok'
+    assert health.stats()['circuit'] == CLOSED
+    for _ in range(20):
+        call(0.1)
+    # A single failure after recovery must not reopen the circuit
+    call(0.1, fails=True)
+    assert health.stats()['circuit'] == CLOSED
+
+
+def test_adaptive_timeout_follows_a_slower_provider(clock, health, call):
+    assert health.timeout() == 10
+    for _ in range(100):
+        call(0.1)
+    assert health.timeout() == 1.0
+
+    # The provider slows to 1.5 s: still well within the 10 s budget, so the
+    # timeout must grow instead of the circuit opening
+    outcomes = [call(1.5) for _ in range(30)]
+    assert 'skipped' not in outcomes
+    assert outcomes.count('timeout') == 6
+    assert outcomes[6:] == ['ok'] * 24
+    assert health.stats()['circuit'] == CLOSED
+    assert health.timeout() == 3.0
+
+
+def test_timeouts_at_the_base_limit_open_the_circuit(health, call):
+    for _ in range(5):
+        assert call(12) == 'timeout'
+    assert health.stats()['circuit'] == OPEN
+
+
+def test_timeout_is_bounded(health, call):
+    for _ in range(20):
+        call(0.01)
+    assert health.timeout() == 1.0
+
+    # Slow calls keep raising the timeout until it reaches the fixed limit
+    outcomes = [call(8) for _ in range(30)]
+    assert 'skipped' not in outcomes
+    assert outcomes[-10:] == ['ok'] * 10
+    assert health.timeout() == 10
+
+
+def test_stats_report_state_and_timeout_together(clock, health, call):
+    for _ in range(20):
+        call(0.1)
+    for _ in range(5):
+        call(0.1, fails=True)
+    stats = health.stats()
+    assert stats['circuit'] == OPEN
+    assert stats['retry_in_seconds'] == 30.0
+
+    clock.advance(30.5)
+    stats = health.stats()
+    assert stats['circuit'] == HALF_OPEN
+    assert stats['timeout_seconds'] == stats['base_timeout_seconds'] == 10